@@ -0,0 +1,203 @@
+# -*- coding: utf-8 -*-
+"""
+Compara os dois motores de transcrição do repositório:
+  - preencher_nr_modular.py  (até 6 níveis, incisos só "I.", alíneas globais na referência)
+  - preencher_trancicao.py   (até 8 níveis, incisos "I." / "I)" / "I -", alíneas por item)
+
+Para cada função (indexar_itens, split_alineas, split_incisos,
+build_transcription_for_ref) roda os dois motores sobre as MESMAS entradas e
+informa: quantas saídas diferem (com exemplos em diff) e a vazão de cada um
+(chamadas/s). O corpus junta um texto sintético de NR (cobre os casos onde os
+motores divergem) e, se configurados, PDFs reais + referências das planilhas.
+
+Como usar:
+1) Ajuste CONFIG (PDFS e PLANILHAS são opcionais; sem eles usa só o sintético).
+2) Rode: python comparar_motores.py
+3) Se OUT_CSV estiver definido, as diferenças por referência são gravadas lá.
+
+Requisitos:
+    pip install pandas openpyxl pdfminer.six PyPDF2
+"""
+
+import difflib
+import random
+import time
+from typing import Callable, Dict, List, Tuple
+
+import pandas as pd
+
+import preencher_nr_modular as modular
+import preencher_trancicao as trancicao
+
+# ========================== CONFIG ==========================
+# PDFs reais: (caminho do PDF, número da NR)
+PDFS = [
+    # (r"C:\Users\RodrigoCinelliPLBras\Downloads\NR05atualizada2023.pdf", 5),
+    # (r"C:\Users\RodrigoCinelliPLBras\Downloads\nr-38-atualizada-2025-3.pdf", 38),
+]
+# Planilhas de onde tirar as referências (coluna FUNDAMENTAÇÃO LEGAL)
+PLANILHAS = [
+    # r"C:\Users\RodrigoCinelliPLBras\Downloads\NR28_AnexoII_planilha_PREENCHIDA.xlsx",
+]
+# CSV com as diferenças por referência (None = não grava)
+OUT_CSV = None
+# Repetições na medição de vazão (maior = medição mais estável)
+REPETICOES = 3
+# Quantos exemplos de diff mostrar por função
+EXEMPLOS = 5
+# ============================================================
+
+
+# ---------------------- Corpus sintético ----------------------
+_INCISO_FMTS = ["{r}. ", "{r}) ", "{r} - "]
+_ROMANOS = ["I", "II", "III", "IV"]
+
+def corpus_sintetico(nr: int = 90, n_secoes: int = 8, seed: int = 28) -> Tuple[str, List[str]]:
+    """
+    Gera um texto no formato de NR e referências no formato da planilha.
+    Cobre: itens de 2 a 8 níveis, alíneas "a)" e "a) -", incisos nos três
+    formatos e referências com várias alíneas por item (escopo por item).
+    """
+    rnd = random.Random(seed)
+    linhas, refs = [], []
+    for s in range(1, n_secoes + 1):
+        secao = f"{nr}.{s}"
+        linhas.append(f"{secao} Disposições da seção {s}")
+        num = secao
+        for prof in range(3, 9):
+            num = f"{num}.{rnd.randint(1, 9)}"
+            linhas.append(f"{num} O empregador deve observar o disposto neste subitem {num}:")
+            letras = "abcd"[:rnd.randint(0, 4)]
+            for l in letras:
+                sep = rnd.choice([") ", ") - "])
+                linhas.append(f"{l}{sep}obrigação {l} do subitem {num};")
+                if l == "b":
+                    fmt = rnd.choice(_INCISO_FMTS)
+                    for r in _ROMANOS[:rnd.randint(1, 4)]:
+                        linhas.append(fmt.format(r=r) + f"inciso {r} da alínea b do subitem {num};")
+            refs.append(f"NR {nr} - {num}")
+            if letras:
+                refs.append(f'NR {nr} - {num}, alínea "{letras[-1]}"')
+                refs.append(f'NR {nr} - {num}, alíneas ' + " e ".join(f'"{l}"' for l in letras))
+            if "b" in letras:
+                refs.append(f'NR {nr} - {num}, alínea "b", incisos I e II')
+        # itens vizinhos com letras diferentes na mesma referência
+        refs.append(f'NR {nr} - {secao}, alínea "a", e {num}, alínea "b"')
+        linhas.append("Este texto não substitui o publicado no DOU")
+    return "\n".join(linhas) + "\n", refs
+
+
+# ------------------------ Corpus real ------------------------
+def refs_das_planilhas(planilhas: List[str], nr_number: int) -> List[str]:
+    """Referências (distintas) da NR alvo encontradas nas planilhas."""
+    nr_regex = rf'^\s*NR\s*-?\s*0*{nr_number}\s*[—–-]\s*'
+    refs = []
+    for path in planilhas:
+        df = pd.read_excel(path)
+        df.columns = [str(c).strip() for c in df.columns]
+        if "FUNDAMENTAÇÃO LEGAL" not in df.columns:
+            continue
+        fund = df["FUNDAMENTAÇÃO LEGAL"].map(trancicao.normalizar_nbsp).fillna("").astype(str)
+        refs.extend(fund[fund.str.match(nr_regex, case=False)])
+    return list(dict.fromkeys(refs))
+
+def montar_corpus() -> List[Tuple[str, str, List[str]]]:
+    """Lista de (nome, texto bruto, referências)."""
+    texto, refs = corpus_sintetico()
+    corpus = [("sintético", texto, refs)]
+    for pdf_path, nr_number in PDFS:
+        bruto = trancicao.extrair_texto(pdf_path)
+        if not bruto.strip():
+            print(f"[WARN] PDF sem texto, ignorado: {pdf_path}")
+            continue
+        corpus.append((f"NR {nr_number}", bruto, refs_das_planilhas(PLANILHAS, nr_number)))
+    return corpus
+
+
+# ------------------------- Medição -------------------------
+def vazao(func: Callable, entradas: list, repeticoes: int = REPETICOES) -> float:
+    """Chamadas por segundo de func sobre as entradas (melhor de N repetições)."""
+    if not entradas:
+        return 0.0
+    melhor = float("inf")
+    for _ in range(repeticoes):
+        t0 = time.perf_counter()
+        for args in entradas:
+            func(*args)
+        melhor = min(melhor, time.perf_counter() - t0)
+    return len(entradas) / melhor if melhor else float("inf")
+
+def _fmt(v) -> str:
+    if isinstance(v, dict):
+        return "\n".join(f"[{k}] {v[k]}" for k in sorted(v))
+    return str(v)
+
+def comparar(nome: str, entradas: list, f_mod: Callable, f_tra: Callable,
+             rotulo: Callable = lambda args: repr(args[0])[:80]) -> Dict:
+    """Roda os dois motores sobre as mesmas entradas; devolve diffs e vazões."""
+    difs = []
+    for args in entradas:
+        a, b = f_mod(*args), f_tra(*args)
+        if a != b:
+            difs.append((rotulo(args), _fmt(a), _fmt(b)))
+    return {
+        "funcao": nome,
+        "entradas": len(entradas),
+        "diferentes": len(difs),
+        "vazao_modular": vazao(f_mod, entradas),
+        "vazao_trancicao": vazao(f_tra, entradas),
+        "difs": difs,
+    }
+
+
+# ------------------------- Relatório -------------------------
+def imprimir(corpus_nome: str, res: Dict) -> None:
+    vm, vt = res["vazao_modular"], res["vazao_trancicao"]
+    razao = vt / vm if vm else float("nan")
+    print(f"\n[{corpus_nome}] {res['funcao']}: {res['entradas']} entrada(s) | "
+          f"{res['diferentes']} diferente(s) | modular {vm:,.0f}/s | "
+          f"trancicao {vt:,.0f}/s ({razao:.2f}x)")
+    for rot, a, b in res["difs"][:EXEMPLOS]:
+        print(f"  • {rot}")
+        diff = difflib.unified_diff(a.splitlines(), b.splitlines(), "modular", "trancicao", lineterm="", n=1)
+        for ln in list(diff)[2:40]:
+            print("      " + ln)
+
+
+def main() -> None:
+    linhas_csv = []
+    for corpus_nome, bruto, refs in montar_corpus():
+        # mesma normalização para os dois (isola as diferenças dos indexadores)
+        norm = trancicao.normalizar_texto(bruto)
+        idx_mod = modular.indexar_itens(norm)
+        idx_tra = trancicao.indexar_itens(norm)
+        blocos = [(b,) for b in idx_tra.values()]
+        alineas = [(seg,) for b in idx_tra.values() for seg in trancicao.split_alineas(b).values()]
+
+        resultados = [
+            comparar("indexar_itens", [(norm,)], modular.indexar_itens, trancicao.indexar_itens,
+                     rotulo=lambda args: f"texto de {len(args[0])} caracteres"),
+            comparar("split_alineas", blocos, modular.split_alineas, trancicao.split_alineas),
+            comparar("split_incisos", alineas, modular.split_incisos, trancicao.split_incisos),
+            # transcrição ponta a ponta: cada motor com o seu próprio índice
+            comparar("build_transcription_for_ref", [(r,) for r in refs],
+                     lambda r: modular.build_transcription_for_ref(r, idx_mod),
+                     lambda r: trancicao.build_transcription_for_ref(r, idx_tra),
+                     rotulo=lambda args: args[0]),
+        ]
+        print(f"\n===== Corpus: {corpus_nome} | {len(idx_mod)} itens (modular) x "
+              f"{len(idx_tra)} itens (trancicao) | {len(refs)} referência(s) =====")
+        for res in resultados:
+            imprimir(corpus_nome, res)
+            for rot, a, b in res["difs"]:
+                linhas_csv.append({"corpus": corpus_nome, "funcao": res["funcao"], "entrada": rot,
+                                   "modular": a, "trancicao": b})
+
+    if OUT_CSV:
+        pd.DataFrame(linhas_csv, columns=["corpus", "funcao", "entrada", "modular", "trancicao"]) \
+          .to_csv(OUT_CSV, index=False, encoding="utf-8-sig")
+        print(f"\nDiferenças salvas em: {OUT_CSV}")
+
+
+if __name__ == "__main__":
+    main()
@@ -7,6 +7,7 @@ Preenche/atualiza a planilha a partir de dados MANUAIS de uma NR específica.
 
 Requisitos:
     pip install pandas openpyxl
+    (opcional: pyarrow, para exportar Parquet)
 """
 
 import re
@@ -16,6 +17,9 @@ from typing import List, Dict, Tuple
 
 import pandas as pd
 
+from preencher_trancicao import (classificacao_da_planilha, classificar_linhas, exportar_colunar,
+                                 mascara_por_grupo, salvar_classificacao, salvar_excel_streaming)
+
 # ============== CONFIG ==============
 # Base atual (já com NRs anteriores)
 XLSX_IN  = Path(r"C:\Users\RodrigoCinelliPLBras\Downloads\NR28_AnexoII_planilha_PREENCHIDA.xlsx")
@@ -25,6 +29,10 @@ XLSX_OUT = Path(r"C:\Users\RodrigoCinelliPLBras\Downloads\NR28_AnexoII_planilha_
 # NR alvo deste run
 TARGET_NR = 38
 
+# Exportações extras da mesma planilha final (None = não gera)
+PARQUET_OUT = None  # ex.: XLSX_OUT.with_suffix(".parquet")
+JSONL_OUT   = None  # ex.: XLSX_OUT.with_suffix(".jsonl")
+
 # ============== DADOS MANUAIS ==============
 # Cada tupla: (Item/Subitem, Código, Infração, Tipo)
 MANUAL_ROWS = [
@@ -74,13 +82,14 @@ MANUAL_ROWS = [
 
 # ============== HELPERS ==============
 def _safe_write_excel(df: pd.DataFrame, out_path: Path) -> Path:
+    # escrita em streaming (strings repetidas uma vez só em sharedStrings)
     try:
-        df.to_excel(out_path, index=False)
+        salvar_excel_streaming(df, out_path)
         return out_path
     except PermissionError:
         ts = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
         alt = out_path.parent / f"{out_path.stem}_{ts}{out_path.suffix}"
-        df.to_excel(alt, index=False)
+        salvar_excel_streaming(df, alt)
         print(f"Aviso: arquivo de saída estava em uso. Salvei como: {alt}")
         return alt
 
@@ -107,11 +116,17 @@ def build_df_from_manual(target_nr: int, manual_rows: List[Tuple[str, str, str,
     return pd.DataFrame(rows), prefix or ""
 
 def fill_spreadsheet_append_safe(xlsx_in: Path, xlsx_out: Path,
-                                 df_new: pd.DataFrame, target_nr: int, prefix_alvo: str) -> None:
+                                 df_new: pd.DataFrame, target_nr: int, prefix_alvo: str,
+                                 parquet_out: Path = None, jsonl_out: Path = None) -> None:
     """
     Mantém a base intacta e:
       - Atualiza SOMENTE os códigos com o prefixo alvo E cuja nova FUNDAMENTAÇÃO começa com 'NR 0*<alvo>'.
       - Acrescenta (no final) códigos novos desse prefixo.
+    Se parquet_out/jsonl_out forem dados, exporta também o frame final nesses formatos.
+    As linhas da base com o prefixo alvo vêm do grupo PREFIXO da classificação em
+    cache (<xlsx_in>.classificacao.json); a classificação (NR / prefixo) da saída
+    é gravada ao lado dela, para os runs seguintes selecionarem linhas sem varrer
+    o texto.
     """
     df_new = df_new.copy()
     df_new["CÓDIGO"] = df_new["CÓDIGO"].astype(str).str.strip()
@@ -129,7 +144,9 @@ def fill_spreadsheet_append_safe(xlsx_in: Path, xlsx_out: Path,
         if "TRANSCRIÇÃO DO ITEM NORMATIVO" not in df_out.columns:
             df_out.insert(1, "TRANSCRIÇÃO DO ITEM NORMATIVO", "")
         saved = _safe_write_excel(df_out, xlsx_out)
+        salvar_classificacao(classificar_linhas(df_out), saved)
         print(f"Planilha gerada do zero com {len(df_out)} linhas. Arquivo: {saved}")
+        exportar_colunar(df_out, parquet_out, jsonl_out)
         return
 
     df_old = pd.read_excel(xlsx_in, engine="openpyxl")
@@ -141,21 +158,27 @@ def fill_spreadsheet_append_safe(xlsx_in: Path, xlsx_out: Path,
         df_old.insert(1, "TRANSCRIÇÃO DO ITEM NORMATIVO", "")
 
     df_old["CÓDIGO"] = df_old["CÓDIGO"].astype(str).str.strip()
+    classif_old = classificacao_da_planilha(df_old, xlsx_in)
 
-    # Filtra df_new por prefixo
+    # Filtra df_new por prefixo (lista manual, pequena) e pega, na base, só as
+    # linhas do grupo desse prefixo: um código com o prefixo alvo só pode estar ali
     if prefix_alvo:
         df_new_target = df_new[df_new["CÓDIGO"].str.startswith(prefix_alvo)].copy()
+        grupo = mascara_por_grupo(classif_old, "PREFIXO", prefix_alvo)
     else:
         df_new_target = df_new.copy()
+        grupo = pd.Series(True, index=df_old.index)
+    codigos_grupo = df_old.loc[grupo, "CÓDIGO"]
 
     mapa_novo = dict(zip(df_new_target["CÓDIGO"], df_new_target["FUNDAMENTAÇÃO LEGAL"]))
 
     # 1) Atualiza os já existentes (mesmo código)
-    mask_update = df_old["CÓDIGO"].isin(df_new_target["CÓDIGO"])
+    mask_update = pd.Series(False, index=df_old.index)
+    mask_update.loc[codigos_grupo.index] = codigos_grupo.isin(df_new_target["CÓDIGO"])
     df_old.loc[mask_update, "FUNDAMENTAÇÃO LEGAL"] = df_old.loc[mask_update, "CÓDIGO"].map(mapa_novo)
 
     # 2) Acrescenta no final os que não existem
-    codigos_existentes = set(df_old["CÓDIGO"])
+    codigos_existentes = set(codigos_grupo)
     df_append = df_new_target[~df_new_target["CÓDIGO"].isin(codigos_existentes)].copy()
 
     # Ajusta colunas e ordem
@@ -166,11 +189,19 @@ def fill_spreadsheet_append_safe(xlsx_in: Path, xlsx_out: Path,
 
     df_out = pd.concat([df_old, df_append], ignore_index=True)
     saved = _safe_write_excel(df_out, xlsx_out)
+
+    # Classificação da saída: reaproveita a da base, refazendo só as linhas alteradas/novas
+    if mask_update.any():
+        classif_old = pd.concat([classif_old[~mask_update], classificar_linhas(df_old[mask_update])]).sort_index()
+    classif_out = pd.concat([classif_old, classificar_linhas(df_append)], ignore_index=True)
+    salvar_classificacao(classif_out, saved)
     print(f"Atualizados (prefixo {prefix_alvo or '—'}): {mask_update.sum()} | Acrescentados: {len(df_append)} | Total final: {len(df_out)}")
     print(f"Planilha salva: {saved}")
+    exportar_colunar(df_out, parquet_out, jsonl_out)
 
 # ============== RUN ==============
 if __name__ == "__main__":
     df_new, prefix = build_df_from_manual(TARGET_NR, MANUAL_ROWS)
     print(f"Resumo NR {TARGET_NR}: {len(df_new)} linhas (manual) | prefixo detectado: {prefix or '—'}")
-    fill_spreadsheet_append_safe(XLSX_IN, XLSX_OUT, df_new, target_nr=TARGET_NR, prefix_alvo=prefix)
+    fill_spreadsheet_append_safe(XLSX_IN, XLSX_OUT, df_new, target_nr=TARGET_NR, prefix_alvo=prefix,
+                                 parquet_out=PARQUET_OUT, jsonl_out=JSONL_OUT)
@@ -7,7 +7,9 @@ citados na coluna "FUNDAMENTAÇÃO LEGAL".
 Como usar:
 1) Ajuste CONFIG (PLANILHA_PATH, PDF_PATH, OUT_PATH, NR_NUMBER).
 2) pip install: pandas openpyxl PyPDF2 pdfminer.six
+   (opcional: pyarrow, para exportar Parquet)
 3) Rode: python preencher_transcricao.py
+   (com PLANILHAS definido, preenche várias planilhas para o mesmo PDF em paralelo)
 
 Observações:
 - O script NÃO separa por anexo; indexa o PDF inteiro e localiza
@@ -19,8 +21,23 @@ Observações:
   as letras de um item para outro).
 """
 
+import glob
+import json
+import mmap
+import multiprocessing
+import os
 import re
+import shutil
+import struct
 import sys
+import tempfile
+import time
+import zipfile
+from collections.abc import Mapping
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime
+
+import numpy as np
 import pandas as pd
 
 # ========================== CONFIG ==========================
@@ -28,6 +45,23 @@ PLANILHA_PATH = r"C:\Users\RodrigoCinelliPLBras\Downloads\NR28_AnexoII_planilha_
 PDF_PATH      = r"C:\Users\RodrigoCinelliPLBras\Downloads\nr-38-atualizada-2025-3.pdf"
 OUT_PATH      = r"C:\Users\RodrigoCinelliPLBras\Downloads\NR28_AnexoII_planilha_NR38_preenchida.xlsx"
 NR_NUMBER     = 38
+# Índice binário do PDF (opcional). Se existir e tiver sido gerado deste mesmo
+# PDF_PATH, é aberto via mmap e o PDF não é relido; senão é (re)gerado. None = não usa.
+INDICE_PATH   = None
+# Modo multi-planilha (opcional): lista de caminhos ou padrão glob. Quando
+# definido, o PDF é indexado uma vez e cada planilha é salva em OUT_DIR.
+PLANILHAS     = None  # ex.: r"C:\Users\RodrigoCinelliPLBras\Downloads\clientes\*.xlsx"
+OUT_DIR       = r"C:\Users\RodrigoCinelliPLBras\Downloads\preenchidas"
+# Processos para resolver as referências de uma planilha grande (1 = serial).
+# COMPARAR_SERIAL roda as duas versões, confere a saída e mostra o speedup.
+# CHUNK_SIZE = referências por lote enviado a cada processo; com até um lote
+# inteiro de referências a resolução é serial.
+WORKERS         = 1
+COMPARAR_SERIAL = False
+CHUNK_SIZE      = 256
+# Exportações extras do mesmo frame (None = não gera). Parquet requer pyarrow.
+PARQUET_PATH    = None
+JSONL_PATH      = None
 # ============================================================
 
 
@@ -54,6 +88,82 @@ def extrair_texto(pdf_path: str) -> str:
         return ""
 
 
+class ExtracaoIncompleta(RuntimeError):
+    """Um extrator falhou depois de já ter entregue páginas: o texto ficaria parcial."""
+    def __init__(self, extrator: str, erro: str):
+        super().__init__(extrator, erro)
+        self.extrator = extrator
+
+    def __str__(self):
+        return f"{self.args[0]} falhou no meio do PDF ({self.args[1]})"
+
+
+def _paginas_pdfminer(pdf_path: str):
+    """Páginas via pdfminer, com o mesmo conversor/LAParams de extract_text."""
+    from io import StringIO
+    from pdfminer.converter import TextConverter
+    from pdfminer.layout import LAParams
+    from pdfminer.pdfinterp import PDFPageInterpreter, PDFResourceManager
+    from pdfminer.pdfpage import PDFPage
+
+    with open(pdf_path, "rb") as f:
+        rsrc = PDFResourceManager(caching=True)
+        saida = StringIO()
+        device = TextConverter(rsrc, saida, laparams=LAParams())
+        try:
+            interp = PDFPageInterpreter(rsrc, device)
+            for page in PDFPage.get_pages(f, caching=True):
+                interp.process_page(page)
+                txt = saida.getvalue()
+                saida.seek(0)
+                saida.truncate(0)
+                yield txt
+        finally:
+            device.close()
+
+def _paginas_pypdf2(pdf_path: str):
+    """
+    Páginas via PyPDF2, com o mesmo "\n" entre páginas de extrair_texto.
+    Falha antes da 1ª página -> nada (como extrair_texto); depois -> ExtracaoIncompleta.
+    """
+    entregou = False
+    try:
+        import PyPDF2
+        with open(pdf_path, "rb") as f:
+            reader = PyPDF2.PdfReader(f)
+            for i, p in enumerate(reader.pages):
+                txt = ("\n" if i else "") + (p.extract_text() or "")
+                entregou = True
+                yield txt
+    except Exception as e:
+        if entregou:
+            raise ExtracaoIncompleta("PyPDF2", str(e)) from e
+
+def extrair_paginas(pdf_path: str):
+    """
+    Versão em streaming de extrair_texto: gera o texto página a página
+    (a concatenação é o mesmo texto). Só a página corrente fica em memória.
+    Se o pdfminer falhar depois de já ter entregue texto, levanta
+    ExtracaoIncompleta em vez de terminar em silêncio com um texto parcial;
+    quem consome deve descartar o que recebeu (ver indexar_pdf_streaming).
+    """
+    achou_texto = False
+    # 1) pdfminer
+    try:
+        for txt in _paginas_pdfminer(pdf_path):
+            achou_texto = achou_texto or bool(txt.strip())
+            yield txt
+    except Exception as e:
+        if achou_texto:
+            # já entregamos páginas: trocar de extrator no meio misturaria textos
+            raise ExtracaoIncompleta("pdfminer", str(e)) from e
+    if achou_texto:
+        return
+
+    # 2) PyPDF2 (fallback)
+    yield from _paginas_pypdf2(pdf_path)
+
+
 def normalizar_texto(bruto: str) -> str:
     """Normaliza o texto sem destruir parágrafos: quebras, espaços, NBSP etc."""
     if not bruto:
@@ -73,6 +183,35 @@ def normalizar_texto(bruto: str) -> str:
     return t
 
 
+def _substituir_caracteres(t: str) -> str:
+    """Parte caractere-a-caractere de normalizar_texto (segura em qualquer corte)."""
+    t = t.replace("\r", "")
+    t = t.replace("\x0c", "\n").replace("\x0b", "\n")
+    return (t.replace("\u00A0", " ")
+             .replace("\u2009", " ")
+             .replace("\u2002", " ")
+             .replace("\u2003", " "))
+
+def normalizar_paginas(paginas):
+    """
+    Versão em streaming de normalizar_texto: recebe trechos (páginas) e gera
+    trechos normalizados cuja concatenação é igual a normalizar_texto(texto todo).
+    O espaço em branco no fim de cada trecho é segurado e juntado ao próximo,
+    para que os colapsos de espaços/linhas vazias nunca sejam cortados ao meio.
+    """
+    resto = ""
+    for pagina in paginas:
+        t = resto + _substituir_caracteres(pagina)
+        corte = len(t.rstrip(" \t\n"))
+        t, resto = t[:corte], t[corte:]
+        if t:
+            t = re.sub(r"[ \t]+", " ", t)
+            yield re.sub(r"\n{3,}", "\n\n", t)
+    if resto:
+        resto = re.sub(r"[ \t]+", " ", resto)
+        yield re.sub(r"\n{3,}", "\n\n", resto)
+
+
 # ------------------- Indexador de itens ---------------------
 # Aceita até 7 níveis: 1, 1.2, 1.2.3, 1.2.3.4.5.6.7
 _ITEM_BLOCK_RE = re.compile(
@@ -90,6 +229,203 @@ def indexar_itens(norm: str) -> dict:
     return items
 
 
+# Só o cabeçalho de _ITEM_BLOCK_RE: o bloco vai de um cabeçalho até o próximo
+_ITEM_HEAD_RE = re.compile(r"(?m)^\s*(\d+(?:\.\d+){0,7})\b")
+
+def _cortar_itens(buf: str, atual, scan: int, fim: int):
+    """
+    Procura cabeçalhos em buf[scan:fim] e devolve os blocos já fechados.
+    buf começa no número do item aberto (atual) ou, sem item aberto, no texto
+    ainda não descartado. Devolve (blocos, buf aparado, atual, scan).
+    """
+    blocos = []
+    inicio = 0
+    for m in list(_ITEM_HEAD_RE.finditer(buf, scan, fim)):
+        if atual is not None:
+            blocos.append((atual, buf[inicio:m.start()].strip()))
+        atual, inicio, scan = m.group(1), m.start(1), m.end()
+    # Um cabeçalho cujos dígitos ainda não chegaram só pode começar no branco
+    # final das linhas completas: a próxima varredura recomeça dali.
+    branco = fim
+    while branco > 0 and buf[branco - 1].isspace():
+        branco -= 1
+    if atual is None:
+        inicio = branco  # nada antes do 1º cabeçalho entra no índice
+    return blocos, buf[inicio:], atual, max(scan, branco) - inicio
+
+def indexar_itens_stream(trechos):
+    """
+    Versão em streaming de indexar_itens: recebe o texto normalizado em trechos
+    (ex.: páginas) e gera (num, bloco) assim que o cabeçalho seguinte aparece,
+    inclusive para itens que atravessam a quebra de página. Em memória fica só
+    o item aberto e a última linha incompleta.
+    dict(indexar_itens_stream(...)) == indexar_itens(texto completo).
+    """
+    buf, atual, scan = "", None, 0
+    for trecho in trechos:
+        buf += trecho
+        # só linhas completas: um cabeçalho não depende do que vem após o último "\n"
+        fim = buf.rfind("\n") + 1
+        blocos, buf, atual, scan = _cortar_itens(buf, atual, scan, fim)
+        yield from blocos
+    blocos, buf, atual, scan = _cortar_itens(buf, atual, scan, len(buf))
+    yield from blocos
+    if atual is not None:
+        yield atual, buf.strip()
+
+def _indexar_paginas(paginas) -> dict:
+    items = {}
+    for num, block in indexar_itens_stream(normalizar_paginas(paginas)):
+        items[num] = block
+    return items
+
+def indexar_pdf_streaming(pdf_path: str) -> dict:
+    """
+    PDF -> índice {item: bloco} página a página (extrair -> normalizar -> indexar).
+    Se o pdfminer falhar no meio do PDF, o índice parcial é descartado e o
+    pipeline recomeça da página 1 com PyPDF2 (mesmo resultado de extrair_texto,
+    que também troca de extrator para o arquivo inteiro). Se o PyPDF2 também
+    falhar no meio, ExtracaoIncompleta sobe: nunca devolve um índice parcial.
+    """
+    try:
+        return _indexar_paginas(extrair_paginas(pdf_path))
+    except ExtracaoIncompleta as e:
+        if e.extrator != "pdfminer":
+            raise
+        print(f"[WARN] {e}; reindexando do início com PyPDF2.")
+    return _indexar_paginas(_paginas_pypdf2(pdf_path))
+
+
+# --------------- Índice binário (compartilhado via mmap) ---------------
+# Layout (inteiros little-endian):
+#   cabeçalho: magic (8 bytes) | n itens | tam. blob de chaves | tam. blob de texto
+#              | tamanho do PDF de origem | mtime_ns do PDF | tam. do caminho do PDF
+#   caminho absoluto do PDF de origem (UTF-8; vazio se o índice não veio de um PDF)
+#   offsets das chaves: n+1 uint64 (relativos ao blob de chaves)
+#   offsets dos blocos: n+1 uint64 (relativos ao blob de texto)
+#   blob de chaves (UTF-8, ordenadas) | blob de texto (UTF-8, blocos concatenados)
+_INDICE_MAGIC = b"NRIDX\x00\x02\x00"
+_INDICE_HEADER = struct.Struct("<8sQQQQqQ")
+_INDICE_OFFSET = struct.Struct("<Q")
+
+def _origem_pdf(pdf_path: str) -> dict:
+    """Identifica o PDF de origem (caminho absoluto, tamanho, mtime) ou {} se não existir."""
+    try:
+        st = os.stat(pdf_path)
+    except (OSError, TypeError):
+        return {}
+    return {"pdf": os.path.abspath(pdf_path), "tamanho": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+def salvar_indice_binario(items: dict, path: str, pdf_path: str = None) -> str:
+    """
+    Grava o índice {item: bloco} num arquivo compacto, pronto para ser aberto
+    via mmap (IndiceBinario) por vários processos ao mesmo tempo.
+    Com pdf_path, grava no cabeçalho a identificação do PDF de origem, para que
+    carregar_indice não reaproveite o índice de outro PDF (ou de uma versão antiga).
+    A escrita é feita num temporário + os.replace, para nunca expor arquivo pela metade.
+    """
+    origem = _origem_pdf(pdf_path) if pdf_path else {}
+    pdf_bytes = origem.get("pdf", "").encode("utf-8")
+    chaves = sorted(items, key=lambda k: k.encode("utf-8"))
+    key_offs, blk_offs = [0], [0]
+    keys_blob, text_blob = bytearray(), bytearray()
+    for k in chaves:
+        keys_blob += k.encode("utf-8")
+        text_blob += items[k].encode("utf-8")
+        key_offs.append(len(keys_blob))
+        blk_offs.append(len(text_blob))
+
+    tmp = f"{path}.tmp{os.getpid()}"
+    with open(tmp, "wb") as f:
+        f.write(_INDICE_HEADER.pack(_INDICE_MAGIC, len(chaves), len(keys_blob), len(text_blob),
+                                    origem.get("tamanho", 0), origem.get("mtime_ns", 0), len(pdf_bytes)))
+        f.write(pdf_bytes)
+        f.write(struct.pack(f"<{len(key_offs)}Q", *key_offs))
+        f.write(struct.pack(f"<{len(blk_offs)}Q", *blk_offs))
+        f.write(keys_blob)
+        f.write(text_blob)
+    os.replace(tmp, path)
+    return path
+
+
+class IndiceBinario(Mapping):
+    """
+    Visão somente-leitura de um índice gravado por salvar_indice_binario.
+    Substitui o dict de indexar_itens (get, in, [], len, iter): os blocos são
+    decodificados sob demanda a partir do mmap, sem carregar o arquivo todo.
+    Processos que abrem o mesmo arquivo compartilham as páginas físicas do SO.
+    """
+
+    def __init__(self, path: str):
+        self.path = str(path)
+        with open(self.path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            magic, n, keys_len, _text_len, pdf_tam, pdf_mtime, pdf_len = _INDICE_HEADER.unpack_from(self._mm, 0)
+        except struct.error:
+            magic = None
+        if magic != _INDICE_MAGIC:
+            self._mm.close()
+            raise ValueError(f"Arquivo não é um índice binário de NR (ou é de versão antiga): {self.path}")
+        pdf = self._mm[_INDICE_HEADER.size:_INDICE_HEADER.size + pdf_len].decode("utf-8")
+        self.origem = {"pdf": pdf, "tamanho": pdf_tam, "mtime_ns": pdf_mtime} if pdf else {}
+        self._n = n
+        self._key_offs = _INDICE_HEADER.size + pdf_len
+        self._blk_offs = self._key_offs + _INDICE_OFFSET.size * (n + 1)
+        self._keys_base = self._blk_offs + _INDICE_OFFSET.size * (n + 1)
+        self._text_base = self._keys_base + keys_len
+
+    def __reduce__(self):
+        # ao enviar para outro processo, só o caminho viaja; o worker reabre o mmap
+        return (IndiceBinario, (self.path,))
+
+    def _span(self, offs_base: int, i: int):
+        a = _INDICE_OFFSET.unpack_from(self._mm, offs_base + _INDICE_OFFSET.size * i)[0]
+        b = _INDICE_OFFSET.unpack_from(self._mm, offs_base + _INDICE_OFFSET.size * (i + 1))[0]
+        return a, b
+
+    def _key_bytes(self, i: int) -> bytes:
+        a, b = self._span(self._key_offs, i)
+        return self._mm[self._keys_base + a:self._keys_base + b]
+
+    def _find(self, item: str) -> int:
+        """Busca binária pela chave; devolve a posição ou -1."""
+        alvo = item.encode("utf-8")
+        lo, hi = 0, self._n
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._key_bytes(mid) < alvo:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self._n and self._key_bytes(lo) == alvo:
+            return lo
+        return -1
+
+    def __getitem__(self, item):
+        i = self._find(item) if isinstance(item, str) else -1
+        if i < 0:
+            raise KeyError(item)
+        a, b = self._span(self._blk_offs, i)
+        return self._mm[self._text_base + a:self._text_base + b].decode("utf-8")
+
+    def __len__(self):
+        return self._n
+
+    def __iter__(self):
+        for i in range(self._n):
+            yield self._key_bytes(i).decode("utf-8")
+
+    def close(self):
+        self._mm.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
 # ---------- Ajudantes para alíneas / incisos ----------
 # alíneas: "a) ..." (aceita variações a )  / a) - / a) –)
 _ALINEA_HEAD_RE = re.compile(
@@ -188,13 +524,16 @@ def parse_ref_segments(ref: str):
     return segs
 
 
-def build_transcription_for_ref(ref: str, items: dict) -> str:
+def build_transcription_for_ref(ref: str, items: dict, segs: list = None) -> str:
     """
     Monta a transcrição para *uma* referência (uma linha da planilha).
     Ex.: "NR 1 - 1.5.3.2, alínea 'b', 1.5.4.3.1, alíneas 'a', 'b' e 'c', e 1.5.4.3.2"
+    segs: resultado já pronto de parse_ref_segments(ref), se houver.
     """
+    if segs is None:
+        segs = parse_ref_segments(ref)
     parts = []
-    for item, letters, romans, _tail in parse_ref_segments(ref):
+    for item, letters, romans, _tail in segs:
         block = items.get(item, "").strip()
         if not block:
             # item não existe na versão do PDF (ex.: renumeração): pula
@@ -271,99 +610,693 @@ def normalizar_nbsp(s: str) -> str:
              .strip())
 
 
+# ---------------------- Escrita XLSX em streaming ----------------------
+# O openpyxl (write-only ou não) grava strings como inlineStr: uma transcrição
+# repetida em N linhas vai N vezes para o XML. Aqui o pacote XLSX é montado à
+# mão: a planilha é escrita linha a linha direto no zip; as colunas que se
+# repetem (a TRANSCRIÇÃO) entram numa tabela sharedStrings própria e as demais
+# (CÓDIGO, FUNDAMENTAÇÃO..., únicas por linha) vão inline, sem ficar em memória.
+_XLSX_NS = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+_XLSX_REL = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+_XLSX_PKG = "http://schemas.openxmlformats.org/package/2006/relationships"
+_XLSX_CT = "application/vnd.openxmlformats-officedocument.spreadsheetml"
+_XLSX_FIXOS = {
+    "[Content_Types].xml": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        f'<Override PartName="/xl/workbook.xml" ContentType="{_XLSX_CT}.sheet.main+xml"/>'
+        f'<Override PartName="/xl/worksheets/sheet1.xml" ContentType="{_XLSX_CT}.worksheet+xml"/>'
+        f'<Override PartName="/xl/sharedStrings.xml" ContentType="{_XLSX_CT}.sharedStrings+xml"/>'
+        f'<Override PartName="/xl/styles.xml" ContentType="{_XLSX_CT}.styles+xml"/>'
+        '</Types>'),
+    "_rels/.rels": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        f'<Relationships xmlns="{_XLSX_PKG}">'
+        f'<Relationship Id="rId1" Type="{_XLSX_REL}/officeDocument" Target="xl/workbook.xml"/>'
+        '</Relationships>'),
+    "xl/workbook.xml": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        f'<workbook xmlns="{_XLSX_NS}" xmlns:r="{_XLSX_REL}">'
+        '<sheets><sheet name="Sheet1" sheetId="1" r:id="rId1"/></sheets></workbook>'),
+    "xl/_rels/workbook.xml.rels": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        f'<Relationships xmlns="{_XLSX_PKG}">'
+        f'<Relationship Id="rId1" Type="{_XLSX_REL}/worksheet" Target="worksheets/sheet1.xml"/>'
+        f'<Relationship Id="rId2" Type="{_XLSX_REL}/sharedStrings" Target="sharedStrings.xml"/>'
+        f'<Relationship Id="rId3" Type="{_XLSX_REL}/styles" Target="styles.xml"/>'
+        '</Relationships>'),
+    # estilos: 0 = padrão, 1 = data e hora, 2 = data, 3 = cabeçalho (como o de df.to_excel)
+    "xl/styles.xml": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        f'<styleSheet xmlns="{_XLSX_NS}">'
+        '<numFmts count="2"><numFmt numFmtId="164" formatCode="yyyy-mm-dd hh:mm:ss"/>'
+        '<numFmt numFmtId="165" formatCode="yyyy-mm-dd"/></numFmts>'
+        '<fonts count="2"><font><sz val="11"/><name val="Calibri"/></font>'
+        '<font><b/><sz val="11"/><name val="Calibri"/></font></fonts>'
+        '<fills count="2"><fill><patternFill patternType="none"/></fill>'
+        '<fill><patternFill patternType="gray125"/></fill></fills>'
+        '<borders count="2"><border><left/><right/><top/><bottom/><diagonal/></border>'
+        '<border><left style="thin"/><right style="thin"/><top style="thin"/><bottom style="thin"/>'
+        '<diagonal/></border></borders>'
+        '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+        '<cellXfs count="4"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+        '<xf numFmtId="164" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+        '<xf numFmtId="165" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+        '<xf numFmtId="0" fontId="1" fillId="0" borderId="1" xfId="0" applyFont="1" applyBorder="1" '
+        'applyAlignment="1"><alignment horizontal="center" vertical="top"/></xf></cellXfs>'
+        '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+        '</styleSheet>'),
+}
+_EPOCA_EXCEL = datetime(1899, 12, 30)
+
+def _coluna_excel(i: int) -> str:
+    """0 -> A, 25 -> Z, 26 -> AA ..."""
+    letras = ""
+    i += 1
+    while i:
+        i, r = divmod(i - 1, 26)
+        letras = chr(65 + r) + letras
+    return letras
+
+def _xml_texto(s: str) -> str:
+    s = _ILLEGAL_XLSX_RE.sub("", s)
+    return s.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+
+def _xml_inline(ref: str, texto: str, estilo: str = "") -> str:
+    return f'<c r="{ref}"{estilo} t="inlineStr"><is><t xml:space="preserve">{_xml_texto(texto)}</t></is></c>'
+
+def _xml_celula(ref: str, v, compartilhadas: dict = None) -> str:
+    """
+    XML de uma célula. NaN/None -> ''. Strings: índice na tabela compartilhada
+    se compartilhadas (dict texto -> posição) for dado; senão inlineStr.
+    """
+    if isinstance(v, np.generic):
+        v = v.item()
+    if v is None or (not isinstance(v, (list, tuple, dict)) and pd.isna(v)):
+        return ""
+    if isinstance(v, bool):
+        return f'<c r="{ref}" t="b"><v>{int(v)}</v></c>'
+    if isinstance(v, (int, float)):
+        if isinstance(v, float) and not np.isfinite(v):
+            return ""
+        return f'<c r="{ref}"><v>{v!r}</v></c>'
+    if isinstance(v, datetime):
+        v = v.replace(tzinfo=None)
+        return f'<c r="{ref}" s="1"><v>{(v - _EPOCA_EXCEL).total_seconds() / 86400!r}</v></c>'
+    if isinstance(v, date):
+        return f'<c r="{ref}" s="2"><v>{(v - _EPOCA_EXCEL.date()).days}</v></c>'
+    if compartilhadas is None:
+        return _xml_inline(ref, str(v))
+    idx = compartilhadas.setdefault(str(v), len(compartilhadas))
+    return f'<c r="{ref}" t="s"><v>{idx}</v></c>'
+
+def salvar_excel_streaming(df: pd.DataFrame, out_path,
+                           compartilhar=("TRANSCRIÇÃO DO ITEM NORMATIVO",)) -> None:
+    """
+    Grava o DataFrame com o mesmo conteúdo (e o mesmo cabeçalho em negrito com
+    bordas) de df.to_excel(out_path, index=False), em streaming: cada linha vai
+    direto para o XML da planilha dentro do zip, sem montar células em memória.
+    Só as colunas em `compartilhar` usam a tabela sharedStrings: a mesma
+    transcrição citada por vários códigos fica uma única vez no arquivo, e o que
+    fica em memória é o conjunto de transcrições distintas (limitado pelos itens
+    do PDF, não pelo número de linhas). As demais colunas vão inline.
+    """
+    compartilhadas = {}
+    colunas = [_coluna_excel(i) for i in range(len(df.columns))]
+    tabelas = [compartilhadas if c in compartilhar else None for c in df.columns]
+
+    with zipfile.ZipFile(out_path, "w", zipfile.ZIP_DEFLATED) as zf:
+        with zf.open("xl/worksheets/sheet1.xml", "w") as f:
+            f.write(('<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+                     f'<worksheet xmlns="{_XLSX_NS}"><sheetData>').encode("utf-8"))
+            cabecalho = "".join(_xml_inline(f"{col}1", str(c), ' s="3"')
+                                for col, c in zip(colunas, df.columns))
+            f.write(f'<row r="1">{cabecalho}</row>'.encode("utf-8"))
+            for n, linha in enumerate(df.itertuples(index=False, name=None), start=2):
+                celulas = "".join(_xml_celula(f"{col}{n}", v, tab)
+                                  for col, v, tab in zip(colunas, linha, tabelas))
+                f.write(f'<row r="{n}">{celulas}</row>'.encode("utf-8"))
+            f.write(b"</sheetData></worksheet>")
+
+        with zf.open("xl/sharedStrings.xml", "w") as f:
+            f.write(('<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+                     f'<sst xmlns="{_XLSX_NS}" uniqueCount="{len(compartilhadas)}">').encode("utf-8"))
+            for texto in compartilhadas:  # dict preserva a ordem de inserção = índice
+                f.write(f'<si><t xml:space="preserve">{_xml_texto(texto)}</t></si>'.encode("utf-8"))
+            f.write(b"</sst>")
+
+        for nome, xml in _XLSX_FIXOS.items():
+            zf.writestr(nome, xml)
+
+
+# ------------------- Classificação das linhas (NR / prefixo) -------------------
+# "NR 4 — resto", "NR-04 – resto", "NR 4 - resto" -> 4  (\s já cobre NBSP e afins)
+_NR_PREFIXO_RE = r'^\s*NR\s*-?\s*0*(\d+)\s*[—–-]'
+_CLASSIF_VERSAO = 2
+
+def classificar_linhas(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Classifica todas as linhas de uma vez (operações vetorizadas do pandas):
+      NR      -> número da NR da FUNDAMENTAÇÃO (Int64; vazio se não começar por "NR x —")
+      PREFIXO -> 3 primeiros dígitos do CÓDIGO (prefixo da NR no Anexo II)
+    O NR segue o mesmo critério do antigo filtro por regex "NR 0*<nr> —|–|-" linha a linha.
+    Os itens citados não entram aqui (só a exportação usa): ver itens_citados.
+    """
+    fund = df["FUNDAMENTAÇÃO LEGAL"].fillna("").astype(str)
+    classif = pd.DataFrame(index=df.index)
+    classif["NR"] = pd.to_numeric(fund.str.extract(_NR_PREFIXO_RE, flags=re.IGNORECASE)[0],
+                                  errors="coerce").astype("Int64")
+    if "CÓDIGO" in df.columns:
+        prefixo = df["CÓDIGO"].astype(str).str.strip().str[:3]
+        classif["PREFIXO"] = prefixo.where(prefixo.str.fullmatch(r"\d{3}"), None)
+    else:
+        classif["PREFIXO"] = None
+    return classif
+
+def _caminho_classificacao(planilha_path) -> str:
+    return f"{planilha_path}.classificacao.json"
+
+def _assinatura(planilha_path) -> dict:
+    st = os.stat(planilha_path)
+    return {"tamanho": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+def salvar_classificacao(classif: pd.DataFrame, planilha_path) -> None:
+    """
+    Grava a classificação ao lado da planilha (<planilha>.classificacao.json),
+    com a assinatura (tamanho + mtime) do arquivo para detectar edições.
+    Só listas planas (NR -1 = sem NR): carregar é um json.load sem conversão
+    por linha. Chamar logo após salvar a planilha.
+    """
+    dados = {
+        "versao": _CLASSIF_VERSAO,
+        "assinatura": _assinatura(planilha_path),
+        "nr": classif["NR"].to_numpy(dtype="int64", na_value=-1).tolist(),
+        "prefixo": classif["PREFIXO"].astype(object).where(classif["PREFIXO"].notna(), None).tolist(),
+    }
+    with open(_caminho_classificacao(planilha_path), "w", encoding="utf-8") as f:
+        json.dump(dados, f, separators=(",", ":"))
+
+def carregar_classificacao(planilha_path, n_linhas: int):
+    """Classificação salva para esta planilha, ou None se não houver/estiver desatualizada."""
+    try:
+        with open(_caminho_classificacao(planilha_path), encoding="utf-8") as f:
+            dados = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if (dados.get("versao") != _CLASSIF_VERSAO
+            or dados.get("assinatura") != _assinatura(planilha_path)
+            or len(dados.get("nr", [])) != n_linhas
+            or len(dados.get("prefixo", [])) != n_linhas):
+        return None
+    nr = np.fromiter(dados["nr"], dtype="int64", count=n_linhas)
+    return pd.DataFrame({
+        "NR": pd.arrays.IntegerArray(nr, nr < 0),
+        "PREFIXO": pd.Series(dados["prefixo"], dtype=object),
+    })
+
+def classificacao_da_planilha(df: pd.DataFrame, planilha_path):
+    """Classificação de df: do arquivo ao lado da planilha se válido; senão calcula e grava."""
+    classif = carregar_classificacao(planilha_path, len(df))
+    if classif is not None:
+        classif.index = df.index
+        return classif
+    classif = classificar_linhas(df)
+    try:
+        salvar_classificacao(classif, planilha_path)
+    except OSError:
+        pass  # cache é opcional (ex.: pasta só-leitura)
+    return classif
+
+def mascara_por_grupo(classif: pd.DataFrame, coluna: str, valor) -> pd.Series:
+    """Linhas com classif[coluna] == valor, via índice agrupado (sem varrer texto)."""
+    pos = classif.groupby(coluna).indices.get(valor, [])
+    mask = np.zeros(len(classif), dtype=bool)
+    mask[pos] = True
+    return pd.Series(mask, index=classif.index)
+
+
+# -------------------- Exportações colunares (Parquet / JSONL) --------------------
+_COLUNAS_EXPORT = ["CÓDIGO", "NR", "ITENS", "FUNDAMENTAÇÃO LEGAL", "INFRAÇÃO", "TIPO",
+                   "TRANSCRIÇÃO DO ITEM NORMATIVO"]
+
+def _texto_ou_none(v):
+    """Célula -> str (ou None se vazia). 2.0 lido pelo Excel vira "2"."""
+    if v is None or (not isinstance(v, (list, tuple)) and pd.isna(v)):
+        return None
+    if isinstance(v, float) and v.is_integer():
+        v = int(v)
+    return str(v).strip()
+
+# "NR 38", "NR-038", "nr38" em qualquer ponto do texto
+_NR_MENCAO_RE = re.compile(r'\bNR\s*-?\s*\d+', re.IGNORECASE)
+
+def itens_citados(df: pd.DataFrame) -> pd.Series:
+    """
+    Lista (sem repetição) dos números de item citados na FUNDAMENTAÇÃO depois
+    do prefixo "NR x —". Só a exportação usa: fica fora de classificar_linhas
+    e do cache, que servem à seleção de linhas.
+    Toda menção "NR x" no resto (prefixo repetido, "NR 38 - NR 38 - 38.8.1",
+    ou citação de outra NR) é removida antes de procurar os números: o número
+    da NR não é item.
+    """
+    fund = df["FUNDAMENTAÇÃO LEGAL"].fillna("").astype(str)
+    resto = fund.str.extract(r'^\s*NR\s*-?\s*0*\d+\s*[—–-]\s*(.*)$',
+                             flags=re.IGNORECASE | re.DOTALL)[0]
+    resto = resto.fillna("").str.replace(_NR_MENCAO_RE, " ", regex=True)
+    return resto.str.findall(_NUM_PAT).map(lambda l: list(dict.fromkeys(l)))
+
+def tabela_exportacao(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Monta, a partir do frame preenchido, a tabela com o esquema das exportações:
+    CÓDIGO, NR (inteiro), ITENS (lista de números de item), FUNDAMENTAÇÃO LEGAL,
+    INFRAÇÃO, TIPO e TRANSCRIÇÃO DO ITEM NORMATIVO. Colunas ausentes ficam vazias.
+    """
+    tab = pd.DataFrame(index=df.index)
+    for col in _COLUNAS_EXPORT:
+        if col == "NR":
+            tab[col] = classificar_linhas(df)["NR"]
+        elif col == "ITENS":
+            tab[col] = itens_citados(df)
+        elif col in df.columns:
+            tab[col] = df[col].map(_texto_ou_none)
+        else:
+            tab[col] = None
+    return tab.reset_index(drop=True)
+
+def exportar_parquet(tab: pd.DataFrame, path: str) -> None:
+    """Grava a tabela de exportação em Parquet com esquema explícito (requer pyarrow)."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([
+        ("CÓDIGO", pa.string()),
+        ("NR", pa.int16()),
+        ("ITENS", pa.list_(pa.string())),
+        ("FUNDAMENTAÇÃO LEGAL", pa.string()),
+        ("INFRAÇÃO", pa.string()),
+        ("TIPO", pa.string()),
+        ("TRANSCRIÇÃO DO ITEM NORMATIVO", pa.string()),
+    ])
+    table = pa.Table.from_pandas(tab[_COLUNAS_EXPORT], schema=schema, preserve_index=False)
+    pq.write_table(table, path)
+
+def exportar_jsonl(tab: pd.DataFrame, path: str) -> None:
+    """Grava a tabela de exportação em JSON Lines, uma linha por vez (sem montar o JSON todo)."""
+    with open(path, "w", encoding="utf-8") as f:
+        for linha in tab[_COLUNAS_EXPORT].itertuples(index=False, name=None):
+            reg = {}
+            for col, v in zip(_COLUNAS_EXPORT, linha):
+                if col == "NR":
+                    v = None if pd.isna(v) else int(v)
+                reg[col] = v
+            f.write(json.dumps(reg, ensure_ascii=False) + "\n")
+
+def exportar_colunar(df: pd.DataFrame, parquet_path: str = None, jsonl_path: str = None) -> None:
+    """Exporta o mesmo frame (já preenchido) para Parquet e/ou JSONL, se pedidos."""
+    if not parquet_path and not jsonl_path:
+        return
+    tab = tabela_exportacao(df)
+    if parquet_path:
+        exportar_parquet(tab, parquet_path)
+        print(f"[OK] Parquet salvo em: {parquet_path}")
+    if jsonl_path:
+        exportar_jsonl(tab, jsonl_path)
+        print(f"[OK] JSONL salvo em: {jsonl_path}")
+
+
+# ------------- Resolução de referências (serial ou em paralelo) -------------
+def resolver_referencia(ref: str, items, segs: list = None) -> str:
+    """Transcrição final de uma referência: montagem + cadeia de limpezas."""
+    texto = build_transcription_for_ref(ref, items, segs)
+    texto = strip_heading_objetivo(texto)
+    texto = strip_carimbo_dou(texto)
+    texto = format_alineas(texto)
+    texto = sanitize_for_excel(texto)
+    return texto
+
+
+_ITEMS_WORKER = None
+
+def _init_worker_indice(indice_path: str) -> None:
+    """Initializer do pool: abre o índice binário uma vez por processo."""
+    global _ITEMS_WORKER
+    _ITEMS_WORKER = IndiceBinario(indice_path)
+
+def _resolver_lote(refs: list) -> list:
+    return [resolver_referencia(ref, _ITEMS_WORKER) for ref in refs]
+
+def resolver_referencias(refs, items, segmentos: dict = None, workers: int = 1,
+                         chunk_size: int = 256, comparar_serial: bool = False) -> dict:
+    """
+    Resolve cada referência distinta -> {ref: texto}.
+    Com workers > 1, as referências vão em lotes de chunk_size para um pool de
+    processos; cada worker abre o índice binário (mmap) uma única vez. Os lotes
+    voltam na ordem de envio (ex.map), então o resultado é determinístico.
+    Com um único lote (len(refs) <= chunk_size) o pool não compensa e a versão
+    serial é usada, o que é informado no log.
+    comparar_serial=True roda também a versão serial, confere que as saídas são
+    idênticas e informa o speedup; nesse caso o pool roda mesmo com um só lote.
+    Se diferirem, devolve a saída serial (a de referência).
+    """
+    refs = list(dict.fromkeys(refs))
+    segmentos = segmentos or {}
+
+    def _serial():
+        return {ref: resolver_referencia(ref, items, segmentos.get(ref)) for ref in refs}
+
+    if workers <= 1:
+        if comparar_serial:
+            print("[WARN] COMPARAR_SERIAL ignorado: exige WORKERS > 1.")
+        return _serial()
+    if len(refs) <= chunk_size and not comparar_serial:
+        print(f"[INFO] {len(refs)} referência(s) cabem em um lote (CHUNK_SIZE={chunk_size}): "
+              f"resolvendo em série, sem o pool de {workers} processo(s).")
+        return _serial()
+
+    tmp_dir = None
+    if isinstance(items, IndiceBinario):
+        indice_path = items.path
+    else:
+        tmp_dir = tempfile.mkdtemp(prefix="nr_indice_")
+        indice_path = salvar_indice_binario(items, os.path.join(tmp_dir, "itens.idx"))
+
+    try:
+        t0 = time.perf_counter()
+        lotes = [refs[i:i + chunk_size] for i in range(0, len(refs), chunk_size)]
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker_indice,
+                                 initargs=(indice_path,)) as ex:
+            textos = [t for lote in ex.map(_resolver_lote, lotes) for t in lote]
+        resultado = dict(zip(refs, textos))
+        t_par = time.perf_counter() - t0
+    finally:
+        if tmp_dir:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    print(f"[INFO] {len(refs)} referência(s) resolvidas em {len(lotes)} lote(s) "
+          f"com {workers} processo(s): {t_par:.2f}s")
+
+    if comparar_serial:
+        t0 = time.perf_counter()
+        serial = _serial()
+        t_ser = time.perf_counter() - t0
+        difs = [ref for ref in refs if serial[ref] != resultado[ref]]
+        print(f"[INFO] Serial: {t_ser:.2f}s | paralelo: {t_par:.2f}s | "
+              f"speedup: {t_ser / t_par if t_par else float('inf'):.2f}x")
+        if difs:
+            print(f"[ERRO] {len(difs)} referência(s) com saída diferente da serial, ex.: {difs[:5]}; "
+                  f"usando a saída serial.")
+            return serial
+        print("[INFO] Saída paralela idêntica à serial.")
+    return resultado
+
+
 # ----------------------------- Main -----------------------------
-def processar_planilha_para_nr(planilha_path: str, pdf_path: str, out_path: str, nr_number: int):
-    # 1) PDF -> texto -> índice de itens
-    bruto = extrair_texto(pdf_path)
-    norm = normalizar_texto(bruto)
-
-    if not norm.strip():
-        print("[WARN] Texto do PDF veio vazio. Verifique OCR/ou permissões.")
-    items = indexar_itens(norm)
+def carregar_indice(pdf_path: str, indice_path: str = None):
+    """
+    Devolve o índice de itens do PDF. Com indice_path: reaproveita o arquivo
+    binário se ele existir e tiver sido gerado a partir deste mesmo PDF (caminho,
+    tamanho e mtime conferem); senão indexa o PDF e (re)grava o arquivo. Nos dois
+    casos devolve um IndiceBinario (fechar com close() ou usar em with); sem
+    indice_path, o dict de indexar_itens.
+    """
+    if indice_path and os.path.exists(indice_path):
+        try:
+            items = IndiceBinario(indice_path)
+        except ValueError as e:
+            print(f"[WARN] {e}; será reconstruído.")
+        else:
+            origem = _origem_pdf(pdf_path)
+            if origem and items.origem == origem:
+                print(f"[INFO] Índice binário reaproveitado: {indice_path} ({len(items)} itens)")
+                return items
+            items.close()
+            print(f"[WARN] Índice binário {indice_path} não corresponde a {pdf_path} "
+                  f"(outro PDF ou PDF alterado); será reconstruído.")
+
+    # extração/normalização/indexação página a página: memória limitada a poucas páginas.
+    # Extração interrompida levanta ExtracaoIncompleta antes de gravar: o arquivo
+    # do índice nunca recebe um índice parcial.
+    items = indexar_pdf_streaming(pdf_path)
+
+    if not items:
+        print("[WARN] Nenhum item indexado: texto do PDF vazio? Verifique OCR/ou permissões.")
     print(f"[INFO] Itens indexados a partir do PDF: {len(items)}")
 
+    if indice_path:
+        salvar_indice_binario(items, indice_path, pdf_path)
+        print(f"[INFO] Índice binário salvo em: {indice_path}")
+        # mesma forma do reaproveitamento: só o caminho viaja entre processos
+        return IndiceBinario(indice_path)
+    return items
+
+
+def ler_planilha_da_nr(planilha_path: str, nr_number: int):
+    """
+    Passos 2 e 3 (não dependem do PDF): lê a planilha, seleciona as linhas da NR
+    alvo pela classificação em cache (classificacao_da_planilha), normaliza a
+    FUNDAMENTAÇÃO só dessas linhas e faz o parse de cada referência distinta.
+    Devolve (df, mask, segmentos, classif) com segmentos = {ref: parse_ref_segments(ref)}.
+    """
     # 2) Ler planilha
     df = pd.read_excel(planilha_path)
     df.columns = [str(c).strip() for c in df.columns]
 
     # Assegura colunas esperadas
     if "FUNDAMENTAÇÃO LEGAL" not in df.columns:
-        print("[ERRO] Coluna 'FUNDAMENTAÇÃO LEGAL' não encontrada na planilha.")
-        sys.exit(2)
+        raise ValueError(f"Coluna 'FUNDAMENTAÇÃO LEGAL' não encontrada na planilha: {planilha_path}")
     if "TRANSCRIÇÃO DO ITEM NORMATIVO" not in df.columns:
         df["TRANSCRIÇÃO DO ITEM NORMATIVO"] = ""
 
     # dtype seguro p/ escrita de strings
     df["TRANSCRIÇÃO DO ITEM NORMATIVO"] = df["TRANSCRIÇÃO DO ITEM NORMATIVO"].astype(object)
 
-    # Normalizar espaços especiais
-    df["FUNDAMENTAÇÃO LEGAL"] = df["FUNDAMENTAÇÃO LEGAL"].apply(normalizar_nbsp)
+    # 3) Linhas da NR alvo: consulta ao grupo da NR na classificação (sem regex por linha)
+    classif = classificacao_da_planilha(df, planilha_path)
+    mask = mascara_por_grupo(classif, "NR", nr_number)
 
-    # 3) Filtrar linhas da NR alvo
-    nr = str(nr_number)
-    nr_regex = rf'^\s*NR\s*-?\s*0*{nr}\s*[—–-]\s*'
-    mask = df["FUNDAMENTAÇÃO LEGAL"].fillna("").str.match(nr_regex, case=False)
+    # Normalizar espaços especiais (só onde vamos trabalhar)
+    df.loc[mask, "FUNDAMENTAÇÃO LEGAL"] = df.loc[mask, "FUNDAMENTAÇÃO LEGAL"].apply(normalizar_nbsp)
 
-    total_nr = int(mask.sum())
-    print(f"[INFO] Linhas detectadas para NR {nr_number}: {total_nr}")
+    # Parse das referências também não depende do PDF: uma vez por referência distinta
+    segmentos = {ref: parse_ref_segments(ref)
+                 for ref in df.loc[mask, "FUNDAMENTAÇÃO LEGAL"].astype(str).unique()}
+    return df, mask, segmentos, classif
 
-    # 4) Preencher as linhas dessa NR
-    filled = 0
-    nao_resolvidas = []
 
-    for idx, row in df[mask].iterrows():
-        ref = str(row["FUNDAMENTAÇÃO LEGAL"])
-        texto = build_transcription_for_ref(ref, items)
-        texto = strip_heading_objetivo(texto)
-        texto = strip_carimbo_dou(texto)
-        texto = format_alineas(texto)
-        texto = sanitize_for_excel(texto)
+def preencher_linhas(df: pd.DataFrame, mask, segmentos: dict, items,
+                     workers: int = 1, comparar_serial: bool = False,
+                     chunk_size: int = 256) -> list:
+    """
+    Passos 4 e 5: preenche a TRANSCRIÇÃO das linhas selecionadas (in-place) e
+    sanitiza a coluna. Devolve a lista de referências que ficaram sem texto.
+    Cada referência distinta é resolvida uma vez (em paralelo se workers > 1).
+    """
+    textos = resolver_referencias(segmentos, items, segmentos, workers=workers,
+                                  chunk_size=chunk_size, comparar_serial=comparar_serial)
+    nao_resolvidas = []
 
+    for idx, ref in df.loc[mask, "FUNDAMENTAÇÃO LEGAL"].astype(str).items():
+        texto = textos[ref]
         if texto:
             df.at[idx, "TRANSCRIÇÃO DO ITEM NORMATIVO"] = texto
-            filled += 1
         else:
             nao_resolvidas.append(ref)
 
-    # 5) Sanitize final e salvar
     df["TRANSCRIÇÃO DO ITEM NORMATIVO"] = df["TRANSCRIÇÃO DO ITEM NORMATIVO"].apply(sanitize_for_excel)
-    df.to_excel(out_path, index=False)
-
-    print(f"[OK] {filled} linha(s) preenchida(s) para 'NR {nr_number} —'.")
-    print(f"Planilha salva em: {out_path}")
-
-    # 6) Diagnóstico
-    if nao_resolvidas:
-        print("\n[DIAGNÓSTICO] Referências sem texto extraído (até 50 exemplos):")
-        for s in nao_resolvidas[:50]:
-            print("  •", s)
-
-        # Diagnóstico aprofundado: quais itens não existem no PDF?
-        faltantes = set()
-        letras_nao_marcadas = []
-        for ref in nao_resolvidas[:200]:  # limita custo
-            for item, letters, romans, _tail in parse_ref_segments(ref):
-                if item not in items:
-                    faltantes.add(item)
-                elif letters:
-                    # pediu letras mas não temos marcação -> checa
-                    alineas = split_alineas(items[item])
-                    falt = [l for l in letters if l not in alineas]
-                    if falt:
-                        letras_nao_marcadas.append((item, letters, sorted(alineas.keys())))
-        if faltantes:
-            print("\n[DIAGNÓSTICO] Itens citados que NÃO aparecem no PDF (possível renumeração/versão):")
-            print(" ", ", ".join(sorted(faltantes)) or "-")
-        if letras_nao_marcadas:
-            print("\n[DIAGNÓSTICO] Itens sem alíneas identificáveis no PDF (ou formatação diferente):")
-            for item, letters, existentes in letras_nao_marcadas[:20]:
-                print(f"  • {item}: pediu {letters} | detectadas {existentes}")
+    return nao_resolvidas
+
+
+def processar_planilha_para_nr(planilha_path: str, pdf_path: str, out_path: str, nr_number: int,
+                               indice_path: str = None, workers: int = 1, comparar_serial: bool = False,
+                               parquet_path: str = None, jsonl_path: str = None,
+                               chunk_size: int = 256):
+    # 1) PDF -> índice de itens, num processo à parte (pdfminer é CPU puro e
+    #    não libera o GIL), enquanto este processo faz os passos 2 e 3.
+    #    Ao sair do with (inclusive por erro) o Pool é terminado: se a leitura da
+    #    planilha falhar, a extração do PDF não fica rodando nem segura a saída.
+    with multiprocessing.Pool(processes=1) as pool:
+        res_items = pool.apply_async(carregar_indice, (pdf_path, indice_path))
+
+        try:
+            df, mask, segmentos, classif = ler_planilha_da_nr(planilha_path, nr_number)
+        except ValueError as e:
+            print(f"[ERRO] {e}")
+            sys.exit(2)
+
+        total_nr = int(mask.sum())
+        print(f"[INFO] Linhas detectadas para NR {nr_number}: {total_nr}")
+
+        try:
+            items = res_items.get()
+        except ExtracaoIncompleta as e:
+            print(f"[ERRO] Não foi possível extrair o PDF inteiro: {e}")
+            sys.exit(2)
+
+    # IndiceBinario (com indice_path) segura um mmap aberto: fecha ao terminar
+    try:
+        # 4) Preencher as linhas dessa NR
+        nao_resolvidas = preencher_linhas(df, mask, segmentos, items, workers, comparar_serial, chunk_size)
+        filled = total_nr - len(nao_resolvidas)
+
+        # 5) Salvar (com a classificação ao lado, para o próximo run) e exportar
+        #    o mesmo frame para os sistemas consumidores
+        salvar_excel_streaming(df, out_path)
+        salvar_classificacao(classif, out_path)
+
+        print(f"[OK] {filled} linha(s) preenchida(s) para 'NR {nr_number} —'.")
+        print(f"Planilha salva em: {out_path}")
+        exportar_colunar(df, parquet_path, jsonl_path)
+
+        # 6) Diagnóstico
+        if nao_resolvidas:
+            print("\n[DIAGNÓSTICO] Referências sem texto extraído (até 50 exemplos):")
+            for s in nao_resolvidas[:50]:
+                print("  •", s)
+
+            # Diagnóstico aprofundado: quais itens não existem no PDF?
+            faltantes = set()
+            letras_nao_marcadas = []
+            for ref in nao_resolvidas[:200]:  # limita custo
+                for item, letters, romans, _tail in segmentos[ref]:
+                    if item not in items:
+                        faltantes.add(item)
+                    elif letters:
+                        # pediu letras mas não temos marcação -> checa
+                        alineas = split_alineas(items[item])
+                        falt = [l for l in letters if l not in alineas]
+                        if falt:
+                            letras_nao_marcadas.append((item, letters, sorted(alineas.keys())))
+            if faltantes:
+                print("\n[DIAGNÓSTICO] Itens citados que NÃO aparecem no PDF (possível renumeração/versão):")
+                print(" ", ", ".join(sorted(faltantes)) or "-")
+            if letras_nao_marcadas:
+                print("\n[DIAGNÓSTICO] Itens sem alíneas identificáveis no PDF (ou formatação diferente):")
+                for item, letters, existentes in letras_nao_marcadas[:20]:
+                    print(f"  • {item}: pediu {letters} | detectadas {existentes}")
+    finally:
+        if isinstance(items, IndiceBinario):
+            items.close()
+
+
+# ------------------- Várias planilhas, um PDF -------------------
+def _preencher_uma_planilha(planilha_path: str, out_path: str, nr_number: int, items) -> dict:
+    """Worker do modo multi-planilha: preenche e salva uma planilha, devolve o resumo."""
+    df, mask, segmentos, classif = ler_planilha_da_nr(planilha_path, nr_number)
+    nao_resolvidas = preencher_linhas(df, mask, segmentos, items)
+    salvar_excel_streaming(df, out_path)
+    salvar_classificacao(classif, out_path)
+    total_nr = int(mask.sum())
+    return {
+        "planilha": planilha_path,
+        "saida": out_path,
+        "linhas_nr": total_nr,
+        "preenchidas": total_nr - len(nao_resolvidas),
+        "nao_resolvidas": len(nao_resolvidas),
+        "erro": "",
+    }
+
+
+def _caminhos_de_saida(planilhas: list, out_dir: str, nr_number: int) -> list:
+    """
+    Caminho de saída de cada planilha, preservando o caminho relativo à pasta
+    comum das entradas. Cria as subpastas; recusa (ValueError) saídas repetidas.
+    """
+    pastas = [os.path.dirname(os.path.abspath(p)) for p in planilhas]
+    try:
+        raiz = os.path.commonpath(pastas)
+    except ValueError:  # ex.: unidades diferentes no Windows
+        raiz = None
+
+    saidas = []
+    for planilha, pasta in zip(planilhas, pastas):
+        rel = os.path.relpath(pasta, raiz) if raiz else ""
+        base = os.path.splitext(os.path.basename(planilha))[0]
+        saidas.append(os.path.normpath(os.path.join(out_dir, rel, f"{base}_NR{nr_number}.xlsx")))
+
+    vistos = {}
+    for planilha, out_path in zip(planilhas, saidas):
+        chave = os.path.normcase(out_path)
+        if chave in vistos:
+            raise ValueError(f"Saída repetida {out_path} para {vistos[chave]} e {planilha}; "
+                             f"remova a duplicata da lista de planilhas.")
+        vistos[chave] = planilha
+    for out_path in saidas:
+        os.makedirs(os.path.dirname(out_path), exist_ok=True)
+    return saidas
+
+
+def processar_varias_planilhas(planilhas, pdf_path: str, out_dir: str, nr_number: int,
+                               indice_path: str = None, max_workers: int = None) -> list:
+    """
+    Preenche várias planilhas (lista de caminhos ou padrão glob) para a mesma NR.
+    O PDF é indexado uma única vez e gravado como índice binário; os processos
+    do pool abrem esse arquivo via mmap (só o caminho é enviado a cada tarefa).
+    Saídas: <out_dir>/<subpasta relativa>/<nome>_NR<nr>.xlsx, mantendo a estrutura
+    de pastas das entradas (a/cli.xlsx e b/cli.xlsx não se sobrescrevem).
+    Devolve um resumo por planilha.
+    """
+    if isinstance(planilhas, str):
+        planilhas = sorted(glob.glob(planilhas))
+    if not planilhas:
+        print("[WARN] Nenhuma planilha encontrada para processar.")
+        return []
+    saidas = _caminhos_de_saida(planilhas, out_dir, nr_number)
+
+    tmp_dir = None
+    if not indice_path:
+        tmp_dir = tempfile.mkdtemp(prefix="nr_indice_")
+        indice_path = os.path.join(tmp_dir, f"NR{nr_number}.idx")
+    items = carregar_indice(pdf_path, indice_path)
+
+    resumo = []
+    try:
+        with ProcessPoolExecutor(max_workers=max_workers) as ex:
+            futs = {}
+            for planilha, out_path in zip(planilhas, saidas):
+                futs[ex.submit(_preencher_uma_planilha, planilha, out_path, nr_number, items)] = (planilha, out_path)
+            for fut, (planilha, out_path) in futs.items():
+                try:
+                    resumo.append(fut.result())
+                except Exception as e:
+                    resumo.append({"planilha": planilha, "saida": out_path, "linhas_nr": 0,
+                                   "preenchidas": 0, "nao_resolvidas": 0, "erro": str(e)})
+    finally:
+        items.close()
+        if tmp_dir:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    print(f"\n[RESUMO] NR {nr_number} — {len(resumo)} planilha(s):")
+    for r in resumo:
+        nome = r["planilha"]
+        if r["erro"]:
+            print(f"  • {nome}: ERRO — {r['erro']}")
+        else:
+            print(f"  • {nome}: {r['linhas_nr']} linha(s) da NR | {r['preenchidas']} preenchida(s) | "
+                  f"{r['nao_resolvidas']} sem texto -> {r['saida']}")
+    return resumo
 
 
 if __name__ == "__main__":
-    processar_planilha_para_nr(
-        planilha_path=PLANILHA_PATH,
-        pdf_path=PDF_PATH,
-        out_path=OUT_PATH,
-        nr_number=NR_NUMBER
-    )
+    if PLANILHAS:
+        processar_varias_planilhas(
+            planilhas=PLANILHAS,
+            pdf_path=PDF_PATH,
+            out_dir=OUT_DIR,
+            nr_number=NR_NUMBER,
+            indice_path=INDICE_PATH
+        )
+    else:
+        processar_planilha_para_nr(
+            planilha_path=PLANILHA_PATH,
+            pdf_path=PDF_PATH,
+            out_path=OUT_PATH,
+            nr_number=NR_NUMBER,
+            indice_path=INDICE_PATH,
+            workers=WORKERS,
+            comparar_serial=COMPARAR_SERIAL,
+            parquet_path=PARQUET_PATH,
+            jsonl_path=JSONL_PATH,
+            chunk_size=CHUNK_SIZE
+        )
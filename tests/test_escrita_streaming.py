@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+"""Saída de salvar_excel_streaming: transcrições na tabela compartilhada, sem repetição."""
+
+import zipfile
+
+import pytest
+
+pd = pytest.importorskip("pandas")
+openpyxl = pytest.importorskip("openpyxl")
+
+from preencher_trancicao import salvar_excel_streaming
+
+
+def _partes(path):
+    with zipfile.ZipFile(path) as zf:
+        nomes = zf.namelist()
+        sst = zf.read("xl/sharedStrings.xml").decode("utf-8") if "xl/sharedStrings.xml" in nomes else None
+        planilha = zf.read("xl/worksheets/sheet1.xml").decode("utf-8")
+    return sst, planilha
+
+
+def test_transcricao_repetida_vai_uma_vez_para_shared_strings(tmp_path):
+    repetido = "Transcrição repetida do item 28.1.1 & <texto>"
+    df = pd.DataFrame({
+        "CÓDIGO": ["128001", "128002", "128003"],
+        "TRANSCRIÇÃO DO ITEM NORMATIVO": [repetido] * 3,
+        "N": [1, 2.5, None],
+    })
+    out = tmp_path / "saida.xlsx"
+    salvar_excel_streaming(df, out)
+
+    sst, planilha = _partes(out)
+    assert sst is not None
+    assert sst.count("Transcrição repetida") == 1
+    assert 't="s"' in planilha
+    # colunas únicas por linha não entram na tabela compartilhada
+    assert "128001" not in sst
+
+    lido = pd.read_excel(out, dtype={"CÓDIGO": str})
+    pd.testing.assert_frame_equal(lido, df)
+
+
+def test_tabela_compartilhada_nao_cresce_com_as_linhas(tmp_path):
+    def gravar(n):
+        df = pd.DataFrame({
+            "CÓDIGO": [f"{i:06d}-0" for i in range(n)],
+            "FUNDAMENTAÇÃO LEGAL": [f"NR 28 - 28.{i}" for i in range(n)],
+            "TRANSCRIÇÃO DO ITEM NORMATIVO": [f"texto {i % 5}" for i in range(n)],
+        })
+        out = tmp_path / f"saida_{n}.xlsx"
+        salvar_excel_streaming(df, out)
+        return _partes(out)[0]
+
+    assert gravar(50) == gravar(2000)
+
+
+def test_mesmo_conteudo_e_cabecalho_de_to_excel(tmp_path):
+    df = pd.DataFrame({
+        "CÓDIGO": ["128001-6", None],
+        "TRANSCRIÇÃO DO ITEM NORMATIVO": ["a) alínea;\nb) outra.", "a) alínea;\nb) outra."],
+        "INFRAÇÃO": [2, 3],
+        "ATIVO": [True, False],
+    })
+    ref, out = tmp_path / "ref.xlsx", tmp_path / "saida.xlsx"
+    df.to_excel(ref, index=False)
+    salvar_excel_streaming(df, out)
+
+    pd.testing.assert_frame_equal(pd.read_excel(out), pd.read_excel(ref))
+    a = openpyxl.load_workbook(out).active["A1"]
+    b = openpyxl.load_workbook(ref).active["A1"]
+    assert a.font.b and b.font.b
+    assert a.border.left.style == b.border.left.style == "thin"
+    assert a.alignment.horizontal == b.alignment.horizontal
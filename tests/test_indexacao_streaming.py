@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+"""O pipeline em streaming (normalizar_paginas / indexar_itens_stream) dá o mesmo resultado do texto inteiro."""
+
+import random
+
+import pytest
+
+pytest.importorskip("pandas")
+
+from preencher_trancicao import indexar_itens, indexar_itens_stream, normalizar_paginas, normalizar_texto
+
+BRUTO = (
+    "MINISTÉRIO DO TRABALHO\r\nNORMA REGULAMENTADORA 28  - FISCALIZAÇÃO\n\n\n\n"
+    "28.1 Fiscalização\n"
+    "28.1.1 A fiscalização do cumprimento das disposições legais  e/ou regulamentares\t\t"
+    "sobre segurança e saúde no trabalho será efetuada obedecendo ao disposto:\n"
+    "a) nos Decretos;\n"
+    "b) - na legislação complementar;   \n\n\n\n\n"
+    "   28.1.2 Aos processos resultantes da ação fiscalizadora é facultado anexar\x0c"
+    "quaisquer documentos.\n"
+    "28.1.2.1 O agente da inspeção do trabalho   poderá:\n"
+    "I. notificar;\nII) conceder prazo;\nIII - lavrar auto.\n"
+    "Este texto não substitui o publicado no DOU\n\n\n"
+    "28.2 Embargo ou interdição\n"
+    "28.2.1 Quando o agente concluir 12 vezes que há grave e iminente risco,\n"
+    "28.1.1 repetido no fim (sobrescreve o primeiro, como no dict).\n"
+    "28.3\n"
+    "   \n\n\t \n"
+    "28.10.1.2.3.4.5.6 último item, oito níveis"
+)
+NORMALIZADO = normalizar_texto(BRUTO)
+
+
+def _cortar(texto, posicoes):
+    posicoes = [0] + sorted(posicoes) + [len(texto)]
+    return [texto[a:b] for a, b in zip(posicoes, posicoes[1:])]
+
+
+def _confere(bruto, trechos_brutos, trechos_norm):
+    assert "".join(normalizar_paginas(trechos_brutos)) == normalizar_texto(bruto)
+    norm = normalizar_texto(bruto)
+    assert dict(indexar_itens_stream(trechos_norm)) == indexar_itens(norm)
+    assert dict(indexar_itens_stream(normalizar_paginas(trechos_brutos))) == indexar_itens(norm)
+
+
+def _posicao(texto, trecho, deslocamento):
+    i = texto.index(trecho)
+    return i + deslocamento
+
+
+@pytest.mark.parametrize("descricao, bruto_pos, norm_pos", [
+    # corte no meio do número de item: "28.1.|2.1"
+    ("número do item", [_posicao(BRUTO, "28.1.2.1", 5)], [_posicao(NORMALIZADO, "28.1.2.1", 5)]),
+    # corte logo depois dos dígitos iniciais: "2|8.10.1..."
+    ("início do número", [_posicao(BRUTO, "28.10.1", 1)], [_posicao(NORMALIZADO, "28.10.1", 1)]),
+    # corte dentro de sequências de espaços e de linhas vazias
+    ("espaços", [_posicao(BRUTO, "  -", 1), _posicao(BRUTO, "\t\t", 1)],
+     [_posicao(NORMALIZADO, "; \n\n 28.1.2", 2), _posicao(NORMALIZADO, "\n\n 28.1.2", 1)]),
+    ("linhas vazias", [_posicao(BRUTO, "\n\n\n\n\n", 2), _posicao(BRUTO, "\n\n\n\n\n", 4),
+                       _posicao(BRUTO, "   28.1.2", 2)],
+     [_posicao(NORMALIZADO, " \n\n \n", 2), _posicao(NORMALIZADO, "28.3", 5)]),
+    # corte entre "\r" e "\n" e logo depois de uma quebra
+    ("quebras", [_posicao(BRUTO, "\r\n", 1), _posicao(BRUTO, "\n28.2 ", 1)],
+     [_posicao(NORMALIZADO, "\n28.2 ", 1)]),
+])
+def test_cortes_nas_fronteiras(descricao, bruto_pos, norm_pos):
+    _confere(BRUTO, _cortar(BRUTO, bruto_pos), _cortar(NORMALIZADO, norm_pos))
+
+
+def test_um_caractere_por_trecho_e_trechos_vazios():
+    _confere(BRUTO, list(BRUTO), list(NORMALIZADO))
+    _confere(BRUTO, ["", BRUTO, ""], ["", NORMALIZADO, "", ""])
+
+
+def test_cortes_aleatorios():
+    rnd = random.Random(28)
+    for _ in range(2000):
+        bruto_pos = [rnd.randint(0, len(BRUTO)) for _ in range(rnd.randint(0, 12))]
+        norm_pos = [rnd.randint(0, len(NORMALIZADO)) for _ in range(rnd.randint(0, 12))]
+        _confere(BRUTO, _cortar(BRUTO, bruto_pos), _cortar(NORMALIZADO, norm_pos))
+
+
+def test_textos_aleatorios():
+    # texto montado de pedaços que exercitam cabeçalhos, brancos e quebras
+    pedacos = ["28", ".", "1", "3", " ", "  ", "\t", "\n", "\n\n\n", "\r", "\x0c", " ",
+               "texto", "a) ", "I. ", "NR ", "-"]
+    rnd = random.Random(38)
+    for _ in range(500):
+        bruto = "".join(rnd.choice(pedacos) for _ in range(rnd.randint(0, 60)))
+        norm = normalizar_texto(bruto)
+        bruto_pos = [rnd.randint(0, len(bruto)) for _ in range(rnd.randint(0, 8))]
+        norm_pos = [rnd.randint(0, len(norm)) for _ in range(rnd.randint(0, 8))]
+        _confere(bruto, _cortar(bruto, bruto_pos), _cortar(norm, norm_pos))
@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+"""Índice binário (salvar_indice_binario / IndiceBinario / carregar_indice)."""
+
+import os
+import pickle
+
+import pytest
+
+pytest.importorskip("pandas")
+
+import preencher_trancicao as trancicao
+from preencher_trancicao import IndiceBinario, carregar_indice, salvar_indice_binario
+
+ITENS = {
+    "28.1": "28.1 Objetivo e campo de aplicação",
+    "28.1.1": "28.1.1 Esta Norma estabelece os procedimentos…",
+    "28.10": "28.10 Disposições finais",
+    "28.2": "28.2 Fiscalização — prazos, alíneas e “aspas”",
+    "5.3.2.1": "5.3.2.1 Item de outra ordem de bytes",
+    "ç.1": "chave com acento (ordem por bytes UTF-8)",
+    "vazio": "",
+}
+
+
+def test_ida_e_volta(tmp_path):
+    path = salvar_indice_binario(ITENS, str(tmp_path / "itens.idx"))
+    with IndiceBinario(path) as idx:
+        assert len(idx) == len(ITENS)
+        assert set(iter(idx)) == set(ITENS)
+        assert dict(idx) == ITENS
+        for k, v in ITENS.items():
+            assert k in idx
+            assert idx[k] == v
+            assert idx.get(k) == v
+        for ausente in ("28.3", "28", "", "zz", 28):
+            assert ausente not in idx
+            assert idx.get(ausente) is None
+        with pytest.raises(KeyError):
+            idx["28.3"]
+
+        copia = pickle.loads(pickle.dumps(idx))
+        try:
+            assert copia.path == idx.path
+            assert dict(copia) == ITENS
+        finally:
+            copia.close()
+
+
+def test_indice_vazio(tmp_path):
+    path = salvar_indice_binario({}, str(tmp_path / "vazio.idx"))
+    with IndiceBinario(path) as idx:
+        assert len(idx) == 0
+        assert list(idx) == []
+        assert "28.1" not in idx
+
+
+def test_arquivo_que_nao_e_indice(tmp_path):
+    path = tmp_path / "lixo.idx"
+    path.write_bytes(b"nao sou um indice")
+    with pytest.raises(ValueError):
+        IndiceBinario(str(path))
+
+
+def test_carregar_indice_reconstroi_quando_o_pdf_muda(tmp_path, monkeypatch):
+    chamadas = []
+
+    def indexar_falso(pdf_path):
+        chamadas.append(pdf_path)
+        with open(pdf_path, encoding="utf-8") as f:
+            return {"28.1": f.read()}
+
+    monkeypatch.setattr(trancicao, "indexar_pdf_streaming", indexar_falso)
+    pdf = tmp_path / "nr.pdf"
+    indice = str(tmp_path / "nr.idx")
+    pdf.write_text("versão 1", encoding="utf-8")
+
+    with carregar_indice(str(pdf), indice) as idx:
+        assert isinstance(idx, IndiceBinario)
+        assert idx["28.1"] == "versão 1"
+    assert len(chamadas) == 1
+
+    # mesmo PDF, sem alteração: reaproveita o arquivo
+    with carregar_indice(str(pdf), indice) as idx:
+        assert idx["28.1"] == "versão 1"
+    assert len(chamadas) == 1
+
+    # PDF alterado (tamanho e mtime diferentes): reconstrói
+    pdf.write_text("versão 2 do PDF", encoding="utf-8")
+    st = os.stat(pdf)
+    os.utime(pdf, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+    with carregar_indice(str(pdf), indice) as idx:
+        assert idx["28.1"] == "versão 2 do PDF"
+    assert len(chamadas) == 2
+
+    # outro PDF apontando para o mesmo arquivo de índice: reconstrói
+    outro = tmp_path / "outra.pdf"
+    outro.write_text("outra NR", encoding="utf-8")
+    with carregar_indice(str(outro), indice) as idx:
+        assert idx["28.1"] == "outra NR"
+    assert len(chamadas) == 3